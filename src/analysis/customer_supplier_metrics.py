@@ -1,59 +1,81 @@
 #!/usr/bin/env python3
 """
-Creates or replaces the 'customer_supplier_metrics' table by joining
-'product', 'sales', and 'customer' tables, grouping by (supplier, customer_type).
+Creates or replaces the 'customer_supplier_metrics' table from the
+(supplier, customer_type) grouping set precomputed in 'metrics_cube'.
 """
 
+import os
+import sys
+
 import duckdb
 
+try:
+    from .metrics_cube import (
+        CUSTOMER_SUPPLIER_GIDS,
+        create_metrics_cube,
+        metrics_cube_exists,
+    )
+except ImportError:
+    # Run as a script, so the sibling module is importable directly
+    from metrics_cube import (
+        CUSTOMER_SUPPLIER_GIDS,
+        create_metrics_cube,
+        metrics_cube_exists,
+    )
+
 
-def create_customer_supplier_metrics(db_path: str = "beverage_analysis.db") -> None:
+def create_customer_supplier_metrics(conn: duckdb.DuckDBPyConnection) -> None:
     """
     Creates or replaces a table named 'customer_supplier_metrics'
 
-    Aggregates data from product, sales, and customer tables:
+    Selects the (supplier, customer_type) rows of the metrics_cube table:
       SUM(sales_volume), SUM(price), and SUM(cost),
       grouped by (supplier, customer_type).
+    :param conn: Open DuckDB connection.
     """
     try:
-        with duckdb.connect(database=db_path, read_only=False) as conn:
-            # Optional: check if the required tables exist
-            required_tables = {"product", "sales", "customer"}
-            existing_tables = set(
-                row[0] for row in conn.execute("SHOW TABLES").fetchall()
-            )
+        # Optional: check if the source table exists
+        if not metrics_cube_exists(conn):
+            print("[Warning] 'metrics_cube' table does not exist. Aborting operation.")
+            return
 
-            missing = required_tables - existing_tables
-            if missing:
-                print(f"[Warning] Missing table(s): {missing}. Aborting operation.")
-                return
-
-            # Create or replace the new aggregation table
-            query = r"""
-                CREATE OR REPLACE TABLE customer_supplier_metrics AS
-                SELECT
-                    p.supplier       AS supplier,
-                    c.customer_type  AS customer_type,
-                    SUM(s.sales_volume) AS sales_volume,
-                    SUM(s.price)        AS price,
-                    SUM(s.cost)         AS cost
-                FROM product p
-                JOIN sales s
-                    ON p.product_id = s.product_id
-                JOIN customer c
-                    ON c.customer_id = s.customer_id
-                GROUP BY p.supplier, c.customer_type
-            """
-
-            conn.execute(query)
+        # Create or replace the new aggregation table
+        query = r"""
+            CREATE OR REPLACE TABLE customer_supplier_metrics AS
+            SELECT
+                supplier,
+                customer_type,
+                sales_volume,
+                price,
+                cost
+            FROM metrics_cube
+            -- (supplier, customer_type)
+            WHERE gid = ANY(?)
+        """
+
+        conn.execute(query, [CUSTOMER_SUPPLIER_GIDS])
         print("[Info] 'customer_supplier_metrics' table created successfully.")
     except Exception as ex:
         print(f"[Error] Failed to create 'customer_supplier_metrics' table: {ex}")
 
 
-def main():
-    create_customer_supplier_metrics("beverage_analysis.db")
-
-
 if __name__ == "__main__":
-    main()
+    # Run as a script only src/analysis is importable, so add src for the db package
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from db import duckdb_setup
+
+    with duckdb.connect(database="beverage_analysis.db", read_only=False) as conn:
+        # Upgrade base tables persisted by earlier versions before the cube reads them
+        duckdb_setup.migrate_tables(conn)
+        # The persisted base tables rarely change between runs, so skip the rebuild
+        fingerprint = duckdb_setup.base_tables_fingerprint(conn)
+        if duckdb_setup.is_up_to_date(conn, "customer_supplier_metrics", fingerprint):
+            print(
+                "[Info] Base tables unchanged; 'customer_supplier_metrics' is up to date."
+            )
+        else:
+            create_metrics_cube(conn)
+            create_customer_supplier_metrics(conn)
+            duckdb_setup.record_fingerprint(
+                conn, "customer_supplier_metrics", fingerprint
+            )
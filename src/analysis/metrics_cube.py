@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Aggregate 'product' ⋈ 'sales' into the temporary 'metrics_cube' table, holding every
+grouping set the derived tables report. Each derived table then selects its grouping
+sets from the cube, so 'sales' is scanned once for the customer-independent grouping
+sets and once, joined to 'customer', for the customer_type ones.
+
+Tables Involved:
+- product  (supplier, brand, family)
+- sales    (sales_volume, price, cost, quarter)
+- customer (customer_type)
+
+Resulting Table:
+- metrics_cube (temporary, lives for the duration of the connection)
+
+Rows are tagged with gid = GROUPING_ID(*CUBE_COLUMNS). The derived tables select
+their rows through the *_GIDS constants below, which are computed from the same
+column order, so the ids can't drift from the query.
+"""
+
+from typing import List, Tuple
+
+import duckdb
+
+# Columns of the cube, in GROUPING_ID argument order (the first is the highest bit)
+CUBE_COLUMNS = ("supplier", "brand", "family", "customer_type", "quarter")
+
+# Grouping sets reported by each derived table
+SUPPLIER_METRICS_SETS = [
+    ("supplier", "brand", "family", "quarter"),
+    ("supplier", "brand", "quarter"),
+    ("supplier", "quarter"),
+    ("quarter",),
+]
+CUSTOMER_SUPPLIER_SETS = [("supplier", "customer_type")]
+UNION_METRICS_SETS = [
+    # supplier hierarchy, across all customer types
+    ("supplier", "brand", "family"),
+    ("supplier", "brand"),
+    ("supplier",),
+    (),
+    # customer types, across all brands and families
+    ("supplier", "customer_type"),
+    ("customer_type",),
+]
+
+
+def grouping_id(grouping_set: Tuple[str, ...]) -> int:
+    """
+    Computes the GROUPING_ID(*CUBE_COLUMNS) value DuckDB gives the rows of a
+    grouping set: one bit per cube column, set when the column is rolled up.
+    :param grouping_set: Columns grouped by.
+    :return: The grouping set's gid in 'metrics_cube'.
+    """
+    return sum(
+        1 << (len(CUBE_COLUMNS) - 1 - position)
+        for position, column in enumerate(CUBE_COLUMNS)
+        if column not in grouping_set
+    )
+
+
+SUPPLIER_METRICS_GIDS = [grouping_id(s) for s in SUPPLIER_METRICS_SETS]
+CUSTOMER_SUPPLIER_GIDS = [grouping_id(s) for s in CUSTOMER_SUPPLIER_SETS]
+UNION_METRICS_GIDS = [grouping_id(s) for s in UNION_METRICS_SETS]
+
+
+def _aggregate_sql(grouping_sets: List[Tuple[str, ...]]) -> str:
+    """
+    Renders the SELECT aggregating product ⋈ sales over the given grouping sets.
+    'customer' is only joined when a set groups by customer_type, and cube columns
+    no set groups by are emitted as NULL with their gid bits set.
+    :param grouping_sets: Grouping sets to aggregate.
+    :return: SELECT producing metrics_cube rows.
+    """
+    grouped = {column for grouping_set in grouping_sets for column in grouping_set}
+    columns = ",\n            ".join(
+        column if column in grouped else f"NULL AS {column}" for column in CUBE_COLUMNS
+    )
+    # GROUPING_ID only accepts grouped columns, so build the same bits by hand
+    gid = " + ".join(
+        (f"(GROUPING({column}) << {bit})" if column in grouped else str(1 << bit))
+        for bit, column in zip(reversed(range(len(CUBE_COLUMNS))), CUBE_COLUMNS)
+    )
+    if "customer_type" in grouped:
+        customer_type = "c.customer_type"
+        customer_join = "LEFT JOIN customer c ON c.customer_id = s.customer_id"
+    else:
+        customer_type = "NULL"
+        customer_join = ""
+    grouping_sets_sql = ",\n            ".join(
+        f"({', '.join(grouping_set)})" for grouping_set in grouping_sets
+    )
+    return f"""
+        SELECT
+            {columns},
+            {gid} AS gid,
+            SUM(sales_volume) AS sales_volume,
+            SUM(price)        AS price,
+            SUM(cost)         AS cost
+        FROM (
+            SELECT
+                p.supplier,
+                p.brand,
+                p.family,
+                {customer_type} AS customer_type,
+                s.quarter,
+                s.sales_volume,
+                s.price,
+                s.cost
+            FROM product p
+            JOIN sales s
+                ON p.product_id = s.product_id
+            {customer_join}
+        )
+        GROUP BY GROUPING SETS (
+            {grouping_sets_sql}
+        )
+    """
+
+
+def create_metrics_cube(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Creates or replaces the temporary 'metrics_cube' table with SUM(sales_volume),
+    SUM(price), and SUM(cost) for every grouping set used by supplier_metrics,
+    supplier_metrics_pivot_by_quarter, customer_supplier_metrics, and union_metrics.
+
+    Grouping sets without customer_type are aggregated over product ⋈ sales alone,
+    so rows in 'customer' (including repeated customer_ids) can't change their
+    totals; only the customer_type sets join 'customer'.
+    :param conn: Open DuckDB connection.
+    """
+    all_sets = list(
+        dict.fromkeys(
+            SUPPLIER_METRICS_SETS + CUSTOMER_SUPPLIER_SETS + UNION_METRICS_SETS
+        )
+    )
+    product_sets = [s for s in all_sets if "customer_type" not in s]
+    customer_sets = [s for s in all_sets if "customer_type" in s]
+
+    query = f"""
+        CREATE OR REPLACE TEMP TABLE metrics_cube AS
+        {_aggregate_sql(product_sets)}
+        UNION ALL
+        {_aggregate_sql(customer_sets)}
+    """
+
+    try:
+        conn.execute(query)
+        print("[Info] 'metrics_cube' table created successfully.")
+    except Exception as ex:
+        print(f"[Error] Failed to create 'metrics_cube' table: {ex}")
+
+
+def metrics_cube_exists(conn: duckdb.DuckDBPyConnection) -> bool:
+    """
+    Checks whether 'metrics_cube' has been created on this connection.
+    :param conn: Open DuckDB connection.
+    :return: True if the table exists.
+    """
+    table_exists_query = """
+        SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'metrics_cube'
+    """
+    return conn.execute(table_exists_query).fetchone()[0] > 0
@@ -1,23 +1,37 @@
 #!/usr/bin/env python3
 """
-Create the 'supplier_metrics' table by aggregating data
-from the 'product' and 'sales' tables using DuckDB's GROUPING SETS.
+Create the 'supplier_metrics' table from the supplier / brand / family / quarter
+GROUPING SETS precomputed in 'metrics_cube'.
 
 Tables Involved:
-- product (supplier, brand, family, etc.)
-- sales   (sales_volume, price, cost, sold_on_date)
+- metrics_cube (supplier, brand, family, quarter, gid, sales_volume, price, cost)
 
 Resulting Table:
 - supplier_metrics
 """
 
+import os
+import sys
+
 import duckdb
 
+try:
+    from .metrics_cube import (
+        SUPPLIER_METRICS_GIDS,
+        create_metrics_cube,
+    )
+except ImportError:
+    # Run as a script, so the sibling module is importable directly
+    from metrics_cube import (
+        SUPPLIER_METRICS_GIDS,
+        create_metrics_cube,
+    )
+
 
-def create_supplier_metrics(db_path: str = "beverage_analysis.db") -> None:
+def create_supplier_metrics(conn: duckdb.DuckDBPyConnection) -> None:
     """
     Creates the supplier_metrics table, which aggregates sales information at different hierarchy levels (supplier, brand, family, quarter).
-    :param db_path: Path to the DuckDB database file.
+    :param conn: Open DuckDB connection.
     """
     query = r"""
         CREATE OR REPLACE TABLE supplier_metrics AS
@@ -25,42 +39,35 @@ def create_supplier_metrics(db_path: str = "beverage_analysis.db") -> None:
             supplier,
             brand,
             family,
-            CAST(((sold_on_date % 100) - 1) / 3 + 1 AS INTEGER) AS quarter,
-            SUM(sales_volume) AS sales_volume,
-            SUM(price)        AS price,
-            SUM(cost)         AS cost
-        FROM (
-            SELECT
-                p.supplier,
-                p.brand,
-                p.family,
-                s.sold_on_date,
-                s.sales_volume,
-                s.price,
-                s.cost
-            FROM product p
-            JOIN sales s
-                ON p.product_id = s.product_id
-        )
-        GROUP BY GROUPING SETS (
-            (supplier, brand, family, quarter),
-            (supplier, brand, quarter),
-            (supplier, quarter),
-            (quarter)
-        );
+            quarter,
+            sales_volume,
+            price,
+            cost
+        FROM metrics_cube
+        -- the grouping sets in SUPPLIER_METRICS_SETS
+        WHERE gid = ANY(?);
     """
 
     try:
-        with duckdb.connect(database=db_path, read_only=False) as conn:
-            conn.execute(query)
+        conn.execute(query, [SUPPLIER_METRICS_GIDS])
         print("[Info] 'supplier_metrics' table created successfully.")
     except Exception as ex:
         print(f"[Error] Failed to create 'supplier_metrics' table: {ex}")
 
 
-def main():
-    create_supplier_metrics(db_path="beverage_analysis.db")
-
-
 if __name__ == "__main__":
-    main()
+    # Run as a script only src/analysis is importable, so add src for the db package
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from db import duckdb_setup
+
+    with duckdb.connect(database="beverage_analysis.db", read_only=False) as conn:
+        # Upgrade base tables persisted by earlier versions before the cube reads them
+        duckdb_setup.migrate_tables(conn)
+        # The persisted base tables rarely change between runs, so skip the rebuild
+        fingerprint = duckdb_setup.base_tables_fingerprint(conn)
+        if duckdb_setup.is_up_to_date(conn, "supplier_metrics", fingerprint):
+            print("[Info] Base tables unchanged; 'supplier_metrics' is up to date.")
+        else:
+            create_metrics_cube(conn)
+            create_supplier_metrics(conn)
+            duckdb_setup.record_fingerprint(conn, "supplier_metrics", fingerprint)
@@ -1,58 +1,96 @@
 #!/usr/bin/env python3
 """
-Pivot the 'supplier_metrics' table to show sales_volume by quarter (Q1, Q2, Q3, Q4).
+Pivot sales_volume by quarter (Q1, Q2, Q3, Q4) for every supplier / brand / family
+level reported in 'supplier_metrics', computed from the quarterly rows of 'metrics_cube'.
 """
 
+import os
+import sys
+
 import duckdb
 
+try:
+    from .metrics_cube import (
+        SUPPLIER_METRICS_GIDS,
+        create_metrics_cube,
+        metrics_cube_exists,
+    )
+except ImportError:
+    # Run as a script, so the sibling module is importable directly
+    from metrics_cube import (
+        SUPPLIER_METRICS_GIDS,
+        create_metrics_cube,
+        metrics_cube_exists,
+    )
+
 
-def pivot_supplier_metrics_by_quarter(db_path: str = "beverage_analysis.db") -> None:
+def pivot_supplier_metrics_by_quarter(conn: duckdb.DuckDBPyConnection) -> None:
     """
     Creates or replaces the 'supplier_metrics_pivot_by_quarter' table, which pivots sales_volume across Q1, Q2, Q3, and Q4 for each supplier, brand, and family.
 
+    The quarterly subtotals are already aggregated in 'metrics_cube', so the pivot
+    only folds those few rows into quarter columns instead of re-scanning 'sales'.
+    Rows keep the supplier / brand / family subtotal levels of 'supplier_metrics'.
+
     Steps:
-    1. Verify 'supplier_metrics' exists in the database.
+    1. Verify 'metrics_cube' exists in the database.
     2. Pivot the sales_volume for each quarter into separate columns.
+
+    :param conn: Open DuckDB connection.
     """
     try:
-        with duckdb.connect(database=db_path, read_only=False) as conn:
-            # 1) Check if 'supplier_metrics' exists
-            table_exists_query = """
-                SELECT COUNT(*) FROM information_schema.tables WHERE table_name = 'supplier_metrics'
-            """
-            exists = conn.execute(table_exists_query).fetchone()[0]
-            if exists == 0:
-                print(
-                    "[Warning] 'supplier_metrics' table does not exist. Aborting pivot operation."
-                )
-                return
-
-            # 2) Pivot the data into a new table
-            pivot_query = r"""
-                CREATE OR REPLACE TABLE supplier_metrics_pivot_by_quarter AS
-                SELECT
-                    supplier,
-                    brand,
-                    family,
-                    -- Sum sales_volume for each quarter separately
-                    SUM(CASE WHEN quarter = 1 THEN sales_volume ELSE 0 END) AS q1_sales_volume,
-                    SUM(CASE WHEN quarter = 2 THEN sales_volume ELSE 0 END) AS q2_sales_volume,
-                    SUM(CASE WHEN quarter = 3 THEN sales_volume ELSE 0 END) AS q3_sales_volume,
-                    SUM(CASE WHEN quarter = 4 THEN sales_volume ELSE 0 END) AS q4_sales_volume
-                FROM supplier_metrics
-                GROUP BY supplier, brand, family
-                ORDER BY supplier, brand, family
-            """
-            conn.execute(pivot_query)
+        # 1) Check if 'metrics_cube' exists
+        if not metrics_cube_exists(conn):
+            print(
+                "[Warning] 'metrics_cube' table does not exist. Aborting pivot operation."
+            )
+            return
+
+        # 2) Pivot the data into a new table
+        pivot_query = r"""
+            CREATE OR REPLACE TABLE supplier_metrics_pivot_by_quarter AS
+            SELECT
+                supplier,
+                brand,
+                family,
+                -- Sum sales_volume for each quarter separately; FILTER is what DuckDB's
+                -- PIVOT compiles to, minus its per-row cast of quarter to VARCHAR
+                COALESCE(SUM(sales_volume) FILTER (WHERE quarter = 1), 0) AS q1_sales_volume,
+                COALESCE(SUM(sales_volume) FILTER (WHERE quarter = 2), 0) AS q2_sales_volume,
+                COALESCE(SUM(sales_volume) FILTER (WHERE quarter = 3), 0) AS q3_sales_volume,
+                COALESCE(SUM(sales_volume) FILTER (WHERE quarter = 4), 0) AS q4_sales_volume
+            FROM metrics_cube
+            -- the supplier_metrics grouping sets, i.e. the ones that include quarter
+            WHERE gid = ANY(?)
+            GROUP BY supplier, brand, family
+            ORDER BY supplier, brand, family
+        """
+        conn.execute(pivot_query, [SUPPLIER_METRICS_GIDS])
 
         print("[Info] 'supplier_metrics_pivot_by_quarter' table created successfully.")
     except Exception as ex:
         print(f"[Error] Failed to pivot supplier metrics: {ex}")
 
 
-def main():
-    pivot_supplier_metrics_by_quarter(db_path="beverage_analysis.db")
-
-
 if __name__ == "__main__":
-    main()
+    # Run as a script only src/analysis is importable, so add src for the db package
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from db import duckdb_setup
+
+    with duckdb.connect(database="beverage_analysis.db", read_only=False) as conn:
+        # Upgrade base tables persisted by earlier versions before the cube reads them
+        duckdb_setup.migrate_tables(conn)
+        # The persisted base tables rarely change between runs, so skip the rebuild
+        fingerprint = duckdb_setup.base_tables_fingerprint(conn)
+        if duckdb_setup.is_up_to_date(
+            conn, "supplier_metrics_pivot_by_quarter", fingerprint
+        ):
+            print(
+                "[Info] Base tables unchanged; 'supplier_metrics_pivot_by_quarter' is up to date."
+            )
+        else:
+            create_metrics_cube(conn)
+            pivot_supplier_metrics_by_quarter(conn)
+            duckdb_setup.record_fingerprint(
+                conn, "supplier_metrics_pivot_by_quarter", fingerprint
+            )
@@ -1,82 +1,67 @@
 #!/usr/bin/env python3
 """
 Create a 'union_metrics' table by:
-1. Union-ing supplier_metrics and customer_supplier_metrics via 'UNION BY NAME'.
-2. Applying another round of GROUPING SETS to produce aggregated rows.
-3. Removing duplicates (if needed) via DISTINCT
+1. Selecting the grouping sets of 'metrics_cube' that cover both the
+   supplier / brand / family hierarchy and the supplier / customer_type levels.
+2. Labelling rolled-up columns as 'ALL ...'.
 """
 
+import os
+import sys
+
 import duckdb
 
+try:
+    from .metrics_cube import (
+        UNION_METRICS_GIDS,
+        create_metrics_cube,
+        metrics_cube_exists,
+    )
+except ImportError:
+    # Run as a script, so the sibling module is importable directly
+    from metrics_cube import (
+        UNION_METRICS_GIDS,
+        create_metrics_cube,
+        metrics_cube_exists,
+    )
+
 
-def create_union_metrics(db_path: str = "beverage_analysis.db") -> None:
+def create_union_metrics(conn: duckdb.DuckDBPyConnection) -> None:
     """
     Creates or replaces 'union_metrics' by:
-      - Unioning rows from supplier_metrics & customer_supplier_metrics
-      - Handling columns that don't exist in one table via NULL placeholders
-      - Applying grouping sets again
-      - Removing duplicates with DISTINCT if desired
+      - Selecting the metrics_cube grouping sets for the levels reported in
+        supplier_metrics and customer_supplier_metrics
+      - Labelling columns rolled up by a grouping set via COALESCE placeholders
+
+    Each grouping set rolls up a different combination of columns, so the labelled
+    rows are already unique and no DISTINCT pass is needed.
+    :param conn: Open DuckDB connection.
     """
     try:
-        with duckdb.connect(database=db_path, read_only=False) as conn:
-
-            # 1) Ensure the source tables exist
-            required_tables = {"supplier_metrics", "customer_supplier_metrics"}
-            existing_tables = {row[0] for row in conn.execute("SHOW TABLES").fetchall()}
-            missing = required_tables - existing_tables
-            if missing:
-                print(
-                    f"[Warning] Missing table(s): {missing}. Aborting union operation."
-                )
-                return
-
-            # 2) Union the two tables by matching column names.
-            union_grouping_query = r"""
-                CREATE OR REPLACE TABLE union_metrics AS
-                WITH union_cte AS (
-                    SELECT
-                        supplier,
-                        brand,
-                        family,
-                        quarter,
-                        NULL AS customer_type,
-                        sales_volume,
-                        price,
-                        cost
-                    FROM supplier_metrics
+        # 1) Ensure the source table exists
+        if not metrics_cube_exists(conn):
+            print(
+                "[Warning] 'metrics_cube' table does not exist. Aborting union operation."
+            )
+            return
 
-                    UNION ALL BY NAME
+        # 2) Both hierarchies come precomputed from the cube; no union or re-aggregation.
+        union_grouping_query = r"""
+            CREATE OR REPLACE TABLE union_metrics AS
+            SELECT
+                COALESCE(supplier, 'ALL SUPPLIERS')       AS supplier,
+                COALESCE(brand, 'ALL BRANDS')             AS brand,
+                COALESCE(family, 'ALL FAMILIES')          AS family,
+                COALESCE(customer_type, 'ALL CUST TYPES') AS customer_type,
+                sales_volume,
+                price,
+                cost
+            FROM metrics_cube
+            -- the grouping sets in UNION_METRICS_SETS
+            WHERE gid = ANY(?);
+        """
 
-                    SELECT
-                        supplier,
-                        NULL AS brand,
-                        NULL AS family,
-                        NULL AS quarter,
-                        customer_type,
-                        sales_volume,
-                        price,
-                        cost
-                    FROM customer_supplier_metrics
-                )
-                SELECT DISTINCT  -- Removes any exact duplicates. You can omit if you want duplicates.
-                    COALESCE(supplier, 'ALL SUPPLIERS')       AS supplier,
-                    COALESCE(brand, 'ALL BRANDS')             AS brand,
-                    COALESCE(family, 'ALL FAMILIES')          AS family,
-                    COALESCE(customer_type, 'ALL CUST TYPES') AS customer_type,
-                    -- Summation across rows that share the same grouping
-                    SUM(sales_volume) AS sales_volume,
-                    SUM(price)        AS price,
-                    SUM(cost)         AS cost
-                FROM union_cte
-                GROUP BY GROUPING SETS (
-                    (supplier, brand, family, customer_type),
-                    (supplier, brand, customer_type),
-                    (supplier, customer_type),
-                    (customer_type)
-                );
-            """
-
-            conn.execute(union_grouping_query)
+        conn.execute(union_grouping_query, [UNION_METRICS_GIDS])
 
         print("[Info] 'union_metrics' table created successfully (with grouping sets).")
 
@@ -84,9 +69,19 @@ def create_union_metrics(db_path: str = "beverage_analysis.db") -> None:
         print(f"[Error] Failed to create 'union_metrics' table: {ex}")
 
 
-def main():
-    create_union_metrics("beverage_analysis.db")
-
-
 if __name__ == "__main__":
-    main()
+    # Run as a script only src/analysis is importable, so add src for the db package
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from db import duckdb_setup
+
+    with duckdb.connect(database="beverage_analysis.db", read_only=False) as conn:
+        # Upgrade base tables persisted by earlier versions before the cube reads them
+        duckdb_setup.migrate_tables(conn)
+        # The persisted base tables rarely change between runs, so skip the rebuild
+        fingerprint = duckdb_setup.base_tables_fingerprint(conn)
+        if duckdb_setup.is_up_to_date(conn, "union_metrics", fingerprint):
+            print("[Info] Base tables unchanged; 'union_metrics' is up to date.")
+        else:
+            create_metrics_cube(conn)
+            create_union_metrics(conn)
+            duckdb_setup.record_fingerprint(conn, "union_metrics", fingerprint)
@@ -3,8 +3,11 @@
 Orchestrator script to create and populate all tables in sequence.
 """
 
+import duckdb
+
 from db import duckdb_setup
 from analysis import (
+    metrics_cube,
     supplier_metrics,
     supplier_metrics_pivot,
     customer_supplier_metrics,
@@ -12,22 +15,55 @@ from analysis import (
 )
 from utils import csv_excel_generation
 
+# Tables written to beverage_analysis.db at the end of a run
+PERSISTED_TABLES = [
+    "product",
+    "customer",
+    "sales",
+    "supplier_metrics",
+    "supplier_metrics_pivot_by_quarter",
+    "customer_supplier_metrics",
+    "union_metrics",
+]
+
+
+def build_derived_tables(conn: duckdb.DuckDBPyConnection) -> None:
+    """
+    Aggregates the product/sales/customer join once into 'metrics_cube' and builds
+    every derived table from it.
+    :param conn: Open DuckDB connection.
+    """
+    metrics_cube.create_metrics_cube(conn)
+    supplier_metrics.create_supplier_metrics(conn)
+    supplier_metrics_pivot.pivot_supplier_metrics_by_quarter(conn)
+    customer_supplier_metrics.create_customer_supplier_metrics(conn)
+    union_metrics.create_union_metrics(conn)
+
 
 def main():
-    """Run all table creation scripts in order."""
-    # 1. Create the base tables (product, customer, sales) and populate data
-    duckdb_setup.init_db_and_populate()
-
-    # 2. Create derived tables
-    supplier_metrics.create_supplier_metrics()
-    supplier_metrics_pivot.pivot_supplier_metrics_by_quarter()
-    customer_supplier_metrics.create_customer_supplier_metrics()
-    union_metrics.create_union_metrics()
-    print("[Info] All tables created successfully.")
-
-    # 3. Generate excel reports
-    csv_excel_generation.export_db_tables()
-    print("[Info] Reports generated successfully in /data folder.")
+    """
+    Run all table creation scripts in order on a single in-memory connection, then
+    persist the results to beverage_analysis.db.
+    """
+    with duckdb_setup.connect(":memory:") as conn:
+        # 1. Create the base tables (product, customer, sales) and populate data
+        duckdb_setup.init_db_and_populate(conn)
+
+        # 2. Create derived tables in one transaction; their row order doesn't matter,
+        #    so let DuckDB aggregate and write them without preserving it. The setting
+        #    is connection-wide, so reset it before copying tables out: persisting and
+        #    exporting with SELECT * must keep the sales clustering and pivot order.
+        conn.execute("SET preserve_insertion_order = false")
+        conn.begin()
+        build_derived_tables(conn)
+        conn.commit()
+        conn.execute("RESET preserve_insertion_order")
+        print("[Info] All tables created successfully.")
+        duckdb_setup.persist_tables(conn, PERSISTED_TABLES, "beverage_analysis.db")
+
+        # 3. Generate excel reports
+        csv_excel_generation.export_db_tables(conn)
+        print("[Info] Reports generated successfully in /data folder.")
 
 
 if __name__ == "__main__":
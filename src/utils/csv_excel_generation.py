@@ -1,10 +1,24 @@
 import duckdb
 import pandas as pd
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def fetch_table(conn: duckdb.DuckDBPyConnection, query: str) -> pd.DataFrame:
+    """
+    Runs a query on its own cursor so several tables can be fetched concurrently.
+
+    Args:
+    - conn: Open DuckDB connection.
+    - query: The SELECT to run.
+    """
+    with conn.cursor() as cursor:
+        return cursor.execute(query).fetchdf()
 
 
 def export_db_tables(
-    db_path: str = "beverage_analysis.db",
+    conn: duckdb.DuckDBPyConnection,
     output_type: str = "excel",
     output_folder: str = "data",
 ):
@@ -13,9 +27,12 @@ def export_db_tables(
     and exports them as either CSV or Excel files based on the given output_type.
 
     Default output_type is 'excel'. Users can modify the output_type to 'csv' as needed.
+    CSV files are written by DuckDB's COPY directly, without going through pandas.
+    For Excel, the tables are fetched concurrently on separate cursors while the
+    sheets are written in order.
 
     Args:
-    - db_path: Path to the DuckDB database file.
+    - conn: Open DuckDB connection.
     - output_type: Either "excel" or "csv". Defaults to "excel".
     - output_folder: The folder to store generated files.
     """
@@ -25,41 +42,40 @@ def export_db_tables(
     # File paths
     excel_file = os.path.join(output_folder, "beverage_analysis.xlsx")
 
-    # Connect to DuckDB
-    conn = duckdb.connect(database=db_path, read_only=True)
-
-    # Fetch each table into a DataFrame
-    tables = {
-        "Product": conn.execute("SELECT * FROM product").fetchdf(),
-        "Customer": conn.execute("SELECT * FROM customer").fetchdf(),
-        "Sales": conn.execute("SELECT * FROM sales").fetchdf(),
-        "Supplier Metrics": conn.execute("SELECT * FROM supplier_metrics").fetchdf(),
-        "Supplier Metrics Pivot": conn.execute(
-            "SELECT * FROM supplier_metrics_pivot_by_quarter"
-        ).fetchdf(),
-        "Customer Supplier Metrics": conn.execute(
-            "SELECT * FROM customer_supplier_metrics"
-        ).fetchdf(),
-        "Union Metrics": conn.execute("SELECT * FROM union_metrics").fetchdf(),
+    # Query behind each exported table
+    queries = {
+        "Product": "SELECT * FROM product",
+        # genre is a list column; reports keep it as comma-separated text
+        "Customer": (
+            "SELECT * REPLACE (array_to_string(genre, ',') AS genre) FROM customer"
+        ),
+        "Sales": "SELECT * FROM sales",
+        "Supplier Metrics": "SELECT * FROM supplier_metrics",
+        "Supplier Metrics Pivot": "SELECT * FROM supplier_metrics_pivot_by_quarter",
+        "Customer Supplier Metrics": "SELECT * FROM customer_supplier_metrics",
+        "Union Metrics": "SELECT * FROM union_metrics",
     }
 
-    # Close the database connection
-    conn.close()
-
     if output_type.lower() == "excel":
-        # Write to Excel with multiple sheets
-        with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
-            for sheet_name, df in tables.items():
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
+        # Fetch all tables in the background and write each sheet as soon as it's ready
+        with ThreadPoolExecutor(max_workers=len(queries)) as pool:
+            futures = {
+                sheet_name: pool.submit(fetch_table, conn, query)
+                for sheet_name, query in queries.items()
+            }
+            with pd.ExcelWriter(excel_file, engine="openpyxl") as writer:
+                for sheet_name, future in futures.items():
+                    future.result().to_excel(writer, sheet_name=sheet_name, index=False)
         print(f"[Info] Exported tables to Excel: {excel_file}")
 
     elif output_type.lower() == "csv":
         # Write each table to a separate CSV
-        for sheet_name, df in tables.items():
+        for sheet_name, query in queries.items():
             csv_file = os.path.join(
                 output_folder, f"{sheet_name.replace(' ', '_').lower()}.csv"
             )
-            df.to_csv(csv_file, index=False)
+            escaped_path = csv_file.replace("'", "''")
+            conn.execute(f"COPY ({query}) TO '{escaped_path}' (FORMAT CSV, HEADER)")
             print(f"[Info] Exported '{sheet_name}' table to CSV: {csv_file}")
 
     else:
@@ -67,7 +83,14 @@ def export_db_tables(
 
 
 if __name__ == "__main__":
-    # Default to Excel file generation
-    export_db_tables()
-    # for CSV file generation, use:
-    # export_db_tables(output_type="csv")
+    # Run as a script only src/utils is importable, so add src for the db package
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from db import duckdb_setup
+
+    # Opened writable so tables persisted by earlier versions can be upgraded first
+    with duckdb.connect(database="beverage_analysis.db", read_only=False) as conn:
+        duckdb_setup.migrate_tables(conn)
+        # Default to Excel file generation
+        export_db_tables(conn)
+        # for CSV file generation, use:
+        # export_db_tables(conn, output_type="csv")
@@ -0,0 +1,84 @@
+# tests/conftest.py
+
+import shutil
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def duckdb_module():
+    """Import duckdb once per session, only when a test needs it."""
+    import duckdb
+
+    return duckdb
+
+
+@pytest.fixture(scope="session")
+def duckdb_setup():
+    """Import the setup module (and with it duckdb) only when a test needs it."""
+    from src.db import duckdb_setup
+
+    return duckdb_setup
+
+
+@pytest.fixture(scope="session")
+def worker_db(tmp_path_factory, request):
+    """Path of the one DuckDB file each test process (pytest-xdist worker) uses."""
+    # Without pytest-xdist there is no workerinput and a single "master" process
+    worker_id = getattr(request.config, "workerinput", {}).get("workerid", "master")
+    return str(tmp_path_factory.mktemp(f"db-{worker_id}") / "db.duckdb")
+
+
+@pytest.fixture(scope="session")
+def shared_conn(duckdb_module, duckdb_setup, worker_db):
+    """One DuckDB connection to the worker's database file, shared by the session."""
+    conn = duckdb_module.connect(worker_db, config=duckdb_setup.CONNECTION_CONFIG)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def worker_conn(shared_conn):
+    """The shared connection with the base tables dropped, so each test starts clean."""
+    shared_conn.execute(
+        "DROP TABLE IF EXISTS sales; "
+        "DROP TABLE IF EXISTS product; "
+        "DROP TABLE IF EXISTS customer"
+    )
+    return shared_conn
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory, duckdb_setup):
+    """Populate a DuckDB file once per session for tests that need a database file."""
+    path = str(tmp_path_factory.mktemp("template") / "template.db")
+    duckdb_setup.init_db_and_populate(None, path, 5, 5, 10).close()
+    return path
+
+
+@pytest.fixture
+def fresh_db_path(template_db, tmp_path):
+    """Copy the template database into this test's tmp_path instead of repopulating."""
+    path = tmp_path / "test_beverage.db"
+    shutil.copy(template_db, path)
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def derived_conn(duckdb_setup):
+    """Populated in-memory database with 'metrics_cube' and every derived table."""
+    from src.analysis import (
+        customer_supplier_metrics,
+        metrics_cube,
+        supplier_metrics,
+        supplier_metrics_pivot,
+        union_metrics,
+    )
+
+    with duckdb_setup.init_db_and_populate(None, ":memory:", 10, 8, 500) as conn:
+        metrics_cube.create_metrics_cube(conn)
+        supplier_metrics.create_supplier_metrics(conn)
+        supplier_metrics_pivot.pivot_supplier_metrics_by_quarter(conn)
+        customer_supplier_metrics.create_customer_supplier_metrics(conn)
+        union_metrics.create_union_metrics(conn)
+        yield conn
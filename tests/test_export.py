@@ -0,0 +1,61 @@
+# tests/test_export.py
+
+import csv
+
+import openpyxl
+import pytest
+
+SHEETS = [
+    "Product",
+    "Customer",
+    "Sales",
+    "Supplier Metrics",
+    "Supplier Metrics Pivot",
+    "Customer Supplier Metrics",
+    "Union Metrics",
+]
+
+
+@pytest.fixture(scope="module")
+def csv_excel_generation():
+    """Import the export module only when an export test runs."""
+    from src.utils import csv_excel_generation
+
+    return csv_excel_generation
+
+
+def test_export_csv(derived_conn, csv_excel_generation, tmp_path):
+    """Check that COPY writes one CSV per table, even into a path with a quote."""
+    output_folder = tmp_path / "it's reports"
+    csv_excel_generation.export_db_tables(
+        derived_conn, output_type="csv", output_folder=str(output_folder)
+    )
+
+    assert sorted(p.name for p in output_folder.iterdir()) == sorted(
+        f"{sheet.replace(' ', '_').lower()}.csv" for sheet in SHEETS
+    )
+
+    # genre is exported as comma-separated text, not a list literal
+    with open(output_folder / "customer.csv", newline="") as f:
+        genres = {int(row["customer_id"]): row["genre"] for row in csv.DictReader(f)}
+    expected = dict(
+        derived_conn.execute(
+            "SELECT customer_id, array_to_string(genre, ',') FROM customer"
+        ).fetchall()
+    )
+    assert genres == expected
+    assert not any(genre.startswith("[") for genre in genres.values())
+
+
+def test_export_excel(derived_conn, csv_excel_generation, tmp_path):
+    """Check that the Excel report has one sheet per table with every row in it."""
+    csv_excel_generation.export_db_tables(derived_conn, output_folder=str(tmp_path))
+
+    workbook = openpyxl.load_workbook(tmp_path / "beverage_analysis.xlsx")
+    assert workbook.sheetnames == SHEETS
+
+    # Header row plus one row per customer, with genre flattened to text
+    customer_rows = list(workbook["Customer"].values)
+    customer_count = derived_conn.execute("SELECT COUNT(*) FROM customer").fetchone()
+    assert len(customer_rows) == customer_count[0] + 1
+    assert all(isinstance(row[-1], str) for row in customer_rows[1:])
@@ -0,0 +1,211 @@
+# tests/test_metrics.py
+
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+
+def _rows(conn, query):
+    """Fetch rows in a canonical order, with float sums rounded for comparison."""
+    rows = conn.execute(query).fetchall()
+    return sorted(
+        (
+            tuple(round(v, 6) if isinstance(v, float) else v for v in row)
+            for row in rows
+        ),
+        key=repr,
+    )
+
+
+def test_supplier_metrics_matches_group_by(derived_conn):
+    """Check the cube's supplier / brand / family / quarter levels against GROUP BYs."""
+    expected = _rows(
+        derived_conn,
+        """
+        WITH joined AS (
+            SELECT p.supplier, p.brand, p.family, s.quarter,
+                   s.sales_volume, s.price, s.cost
+            FROM product p
+            JOIN sales s ON p.product_id = s.product_id
+        )
+        SELECT supplier, brand, family, quarter,
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier, brand, family, quarter
+        UNION ALL
+        SELECT supplier, brand, NULL, quarter,
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier, brand, quarter
+        UNION ALL
+        SELECT supplier, NULL, NULL, quarter,
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier, quarter
+        UNION ALL
+        SELECT NULL, NULL, NULL, quarter,
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY quarter
+        """,
+    )
+
+    assert _rows(derived_conn, "SELECT * FROM supplier_metrics") == expected
+
+
+def test_customer_supplier_metrics_matches_group_by(derived_conn):
+    """Check the cube's (supplier, customer_type) level against a GROUP BY."""
+    expected = _rows(
+        derived_conn,
+        """
+        SELECT p.supplier, c.customer_type,
+               SUM(s.sales_volume), SUM(s.price), SUM(s.cost)
+        FROM product p
+        JOIN sales s ON p.product_id = s.product_id
+        LEFT JOIN customer c ON c.customer_id = s.customer_id
+        GROUP BY p.supplier, c.customer_type
+        """,
+    )
+
+    assert _rows(derived_conn, "SELECT * FROM customer_supplier_metrics") == expected
+
+
+def test_union_metrics_labels_are_unique(derived_conn):
+    """Check that every labelled level appears once, with no duplicate rows."""
+    total_rows, unique_labels = derived_conn.execute(
+        "SELECT COUNT(*), COUNT(DISTINCT (supplier, brand, family, customer_type)) "
+        "FROM union_metrics"
+    ).fetchone()
+
+    assert total_rows == unique_labels
+
+
+def test_union_metrics_matches_group_by(derived_conn):
+    """Check each labelled level of union_metrics against a plain GROUP BY."""
+    expected = _rows(
+        derived_conn,
+        """
+        WITH joined AS (
+            SELECT p.supplier, p.brand, p.family, c.customer_type,
+                   s.sales_volume, s.price, s.cost
+            FROM product p
+            JOIN sales s ON p.product_id = s.product_id
+            LEFT JOIN customer c ON c.customer_id = s.customer_id
+        )
+        SELECT supplier, brand, family, 'ALL CUST TYPES',
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier, brand, family
+        UNION ALL
+        SELECT supplier, brand, 'ALL FAMILIES', 'ALL CUST TYPES',
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier, brand
+        UNION ALL
+        SELECT supplier, 'ALL BRANDS', 'ALL FAMILIES', 'ALL CUST TYPES',
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier
+        UNION ALL
+        SELECT 'ALL SUPPLIERS', 'ALL BRANDS', 'ALL FAMILIES', 'ALL CUST TYPES',
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined
+        UNION ALL
+        SELECT supplier, 'ALL BRANDS', 'ALL FAMILIES', customer_type,
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY supplier, customer_type
+        UNION ALL
+        SELECT 'ALL SUPPLIERS', 'ALL BRANDS', 'ALL FAMILIES', customer_type,
+               SUM(sales_volume), SUM(price), SUM(cost)
+        FROM joined GROUP BY customer_type
+        """,
+    )
+
+    assert _rows(derived_conn, "SELECT * FROM union_metrics") == expected
+
+
+def test_quarter_pivot_matches_quarter_sums(derived_conn):
+    """Check the quarter pivot against per-quarter sums, with 0 for empty quarters."""
+    quarter_sums = ", ".join(
+        f"SUM(CASE WHEN quarter = {q} THEN sales_volume ELSE 0 END)"
+        for q in range(1, 5)
+    )
+    expected = _rows(
+        derived_conn,
+        f"""
+        WITH joined AS (
+            SELECT p.supplier, p.brand, p.family, s.quarter, s.sales_volume
+            FROM product p
+            JOIN sales s ON p.product_id = s.product_id
+        )
+        SELECT supplier, brand, family, {quarter_sums}
+        FROM joined GROUP BY supplier, brand, family
+        UNION ALL
+        SELECT supplier, brand, NULL, {quarter_sums}
+        FROM joined GROUP BY supplier, brand
+        UNION ALL
+        SELECT supplier, NULL, NULL, {quarter_sums}
+        FROM joined GROUP BY supplier
+        UNION ALL
+        SELECT NULL, NULL, NULL, {quarter_sums}
+        FROM joined
+        """,
+    )
+    pivot = _rows(derived_conn, "SELECT * FROM supplier_metrics_pivot_by_quarter")
+
+    assert pivot == expected
+    # Sales only fall in Q1 and Q2, so the later quarters are 0, not NULL
+    assert all(row[5] == 0 and row[6] == 0 for row in pivot)
+
+
+def test_duplicate_customer_ids_leave_supplier_totals_unchanged(duckdb_setup):
+    """Check that repeated customer_ids don't multiply the customer-independent sets."""
+    from src.analysis import metrics_cube, supplier_metrics, union_metrics
+
+    def build(conn):
+        metrics_cube.create_metrics_cube(conn)
+        supplier_metrics.create_supplier_metrics(conn)
+        union_metrics.create_union_metrics(conn)
+        return (
+            _rows(conn, "SELECT * FROM supplier_metrics"),
+            _rows(
+                conn,
+                "SELECT * FROM union_metrics WHERE customer_type = 'ALL CUST TYPES'",
+            ),
+        )
+
+    with duckdb_setup.init_db_and_populate(None, ":memory:", 10, 8, 500) as conn:
+        before = build(conn)
+        conn.execute("INSERT INTO customer SELECT * FROM customer")
+        after = build(conn)
+
+    assert before[0] and before[1]
+    assert after == before
+
+
+def test_standalone_script_skips_unchanged_base_tables(
+    template_db, duckdb_module, duckdb_setup, tmp_path
+):
+    """Check that a standalone run rebuilds only when the base tables changed."""
+    script = Path(__file__).parent.parent / "src" / "analysis" / "supplier_metrics.py"
+    db_path = str(tmp_path / "beverage_analysis.db")
+    shutil.copy(template_db, db_path)
+
+    def run_script():
+        return subprocess.run(
+            [sys.executable, str(script)],
+            cwd=tmp_path,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+
+    built = "'supplier_metrics' table created successfully"
+    assert built in run_script()
+    assert "'supplier_metrics' is up to date" in run_script()
+
+    with duckdb_module.connect(db_path) as conn:
+        conn.execute("INSERT INTO sales SELECT * FROM sales LIMIT 1")
+    assert built in run_script()
+
+    # Persisting identical data keeps the fingerprint, but still forces a rebuild
+    with duckdb_module.connect(":memory:") as conn:
+        conn.execute(f"ATTACH '{db_path}' AS source (READ_ONLY)")
+        conn.execute("CREATE TABLE sales AS SELECT * FROM source.sales")
+        conn.execute("DETACH source")
+        duckdb_setup.persist_tables(conn, ["sales"], db_path)
+    assert built in run_script()
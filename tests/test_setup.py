@@ -1,39 +1,190 @@
 # tests/test_setup.py
 
+import time
+
 import pytest
-import duckdb
-from src.db.duckdb_setup import init_db_and_populate
 
 
-@pytest.fixture
-def test_db_path(tmp_path):
-    """Use a temporary path for the DuckDB file so each test is isolated."""
-    return str(tmp_path / "test_beverage.db")
+@pytest.fixture(scope="module")
+def populated_db(template_db, duckdb_module):
+    """Read-only connection to the session's populated database, shared by the module."""
+    with duckdb_module.connect(template_db, read_only=True) as conn:
+        yield conn
 
 
-def test_init_db_and_populate(test_db_path):
-    """Check that product, customer, and sales tables are created and non-empty."""
-    # Run the setup on a fresh DB
-    init_db_and_populate(
-        db_path=test_db_path, num_products=5, num_customers=5, num_sales=10
+def test_init_db_and_populate(populated_db):
+    """Check that product, customer, and sales tables exist with the requested rows."""
+    # Freshly bulk-loaded tables have exact row counts in the catalog, so no scan
+    row_counts = dict(
+        populated_db.execute(
+            "SELECT table_name, estimated_size FROM duckdb_tables() "
+            "WHERE schema_name = 'main' "
+            "AND table_name IN ('product', 'customer', 'sales')"
+        ).fetchall()
     )
 
-    # Connect and verify
-    conn = duckdb.connect(test_db_path)
-    tables = [row[0] for row in conn.execute("SHOW TABLES").fetchall()]
+    assert row_counts == {"product": 5, "customer": 5, "sales": 10}
+
+
+def test_init_db_and_populate_on_open_connection(worker_conn, duckdb_setup):
+    """Check that tables are populated on, and returned through, a passed-in connection."""
+    conn = duckdb_setup.init_db_and_populate(worker_conn, None, 2, 2, 3)
+
+    assert conn is worker_conn
+    assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 3
+
+
+def test_init_db_and_populate_opens_connection(duckdb_setup):
+    """Check that a connection is opened on `db_path` when none is passed in."""
+    with duckdb_setup.init_db_and_populate(None, ":memory:", 2, 2, 3) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 3
+
+
+def test_populate_tables_failure_leaves_tables_empty(
+    worker_conn, duckdb_setup, monkeypatch
+):
+    """Check that a failed insert rolls back the rows already inserted."""
+    import pandas as pd
+
+    duckdb_setup.create_tables(worker_conn)
+    # Products and sales go in first; the customer append then fails
+    monkeypatch.setattr(
+        duckdb_setup,
+        "generate_customer_records",
+        lambda num_customers: pd.DataFrame({"missing_column": [1]}),
+    )
+
+    duckdb_setup.populate_tables(worker_conn, 2, 2, 3)
+
+    for table in ("product", "customer", "sales"):
+        count = worker_conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        assert count == 0, table
+
+
+def test_populate_tables_in_open_transaction(worker_conn, duckdb_setup):
+    """Check that populating joins a transaction the caller already opened."""
+    duckdb_setup.create_tables(worker_conn)
+
+    worker_conn.begin()
+    duckdb_setup.populate_tables(worker_conn, 2, 2, 3)
+    assert worker_conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 3
+    # Still the caller's transaction, so its rollback undoes the inserts
+    worker_conn.rollback()
+
+    assert worker_conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("num_sales", [10, 100_000])
+def test_populate_speed(duckdb_setup, num_sales):
+    """Check that populating stays bulk: 100k sales rows must load in seconds."""
+    start = time.perf_counter()
+    conn = duckdb_setup.init_db_and_populate(None, ":memory:", 30, 20, num_sales)
+    elapsed = time.perf_counter() - start
+    with conn:
+        assert conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0] == num_sales
+    assert elapsed < 5.0
+
+
+# sold_on_date -> quarter for every month insert_sales_records draws from
+EXPECTED_QUARTERS = {202401: 1, 202402: 1, 202403: 1, 202404: 2, 202405: 2}
+
+
+def test_insert_sales_records_quarters(duckdb_module, duckdb_setup):
+    """Check the quarter stored for fresh sales, e.g. March in Q1 and April in Q2."""
+    with duckdb_module.connect(":memory:") as conn:
+        duckdb_setup.create_tables(conn)
+        # Enough rows that every month in the date options is drawn
+        duckdb_setup.insert_sales_records(conn, num_sales=1000)
+        quarters = dict(
+            conn.execute("SELECT DISTINCT sold_on_date, quarter FROM sales").fetchall()
+        )
+
+    assert quarters == EXPECTED_QUARTERS
+
+
+def test_create_tables_backfills_quarter(fresh_db_path, duckdb_module, duckdb_setup):
+    """Check that a database from before 'quarter' existed gets it added and filled."""
+    with duckdb_module.connect(fresh_db_path) as conn:
+        conn.execute("ALTER TABLE sales DROP COLUMN quarter")
+        # Make sure the quarter boundary months are among the rows to backfill
+        conn.execute(
+            "INSERT INTO sales VALUES (1, 1, 202403, 1, 1, 1), (1, 1, 202404, 1, 1, 1)"
+        )
+        duckdb_setup.create_tables(conn)
+
+    # Verify on a read-only connection: no WAL or checkpoint work on close
+    with duckdb_module.connect(fresh_db_path, read_only=True) as conn:
+        quarters = dict(
+            conn.execute("SELECT DISTINCT sold_on_date, quarter FROM sales").fetchall()
+        )
+
+    assert quarters[202403] == 1
+    assert quarters[202404] == 2
+    assert quarters == {month: EXPECTED_QUARTERS[month] for month in quarters}
+
+
+def test_create_tables_converts_genre_to_list(
+    fresh_db_path, duckdb_module, duckdb_setup
+):
+    """Check that a comma-joined 'genre' column from an older database becomes a list."""
+    with duckdb_module.connect(fresh_db_path) as conn:
+        expected = conn.execute(
+            "SELECT customer_id, genre FROM customer ORDER BY customer_id"
+        ).fetchall()
+        conn.execute(
+            "ALTER TABLE customer ALTER genre TYPE VARCHAR "
+            "USING array_to_string(genre, ',')"
+        )
+        duckdb_setup.create_tables(conn)
+
+    with duckdb_module.connect(fresh_db_path, read_only=True) as conn:
+        genres = conn.execute(
+            "SELECT customer_id, genre FROM customer ORDER BY customer_id"
+        ).fetchall()
+
+    assert genres == expected
+
+
+@pytest.fixture
+def source_conn(duckdb_module):
+    """In-memory connection holding a small table to persist."""
+    with duckdb_module.connect(":memory:") as conn:
+        conn.execute("CREATE TABLE metrics AS SELECT range AS id FROM range(3)")
+        yield conn
+
+
+def _is_attached(conn):
+    """Whether the "persisted" database from persist_tables is still attached."""
+    return conn.execute(
+        "SELECT COUNT(*) FROM duckdb_databases() WHERE database_name = 'persisted'"
+    ).fetchone()[0]
+
+
+def test_persist_tables_replaces(source_conn, duckdb_module, duckdb_setup, tmp_path):
+    """Check that persisting twice replaces the tables instead of appending to them."""
+    db_path = str(tmp_path / "persisted.db")
+    duckdb_setup.persist_tables(source_conn, ["metrics"], db_path)
+    duckdb_setup.persist_tables(source_conn, ["metrics"], db_path)
+
+    assert not _is_attached(source_conn)
+    with duckdb_module.connect(db_path, read_only=True) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0] == 3
+
 
-    # Ensure the tables exist
-    assert "product" in tables
-    assert "customer" in tables
-    assert "sales" in tables
+def test_persist_tables_failure_keeps_target(
+    source_conn, duckdb_module, duckdb_setup, tmp_path
+):
+    """Check that a failed copy rolls back and leaves the target file as it was."""
+    db_path = str(tmp_path / "persisted.db")
+    duckdb_setup.persist_tables(source_conn, ["metrics"], db_path)
 
-    # Ensure they are not empty
-    product_count = conn.execute("SELECT COUNT(*) FROM product").fetchone()[0]
-    customer_count = conn.execute("SELECT COUNT(*) FROM customer").fetchone()[0]
-    sales_count = conn.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    source_conn.execute("INSERT INTO metrics VALUES (3)")
+    duckdb_setup.persist_tables(source_conn, ["metrics", "missing_table"], db_path)
 
-    assert product_count > 0
-    assert customer_count > 0
-    assert sales_count > 0
+    assert not _is_attached(source_conn)
+    with duckdb_module.connect(db_path, read_only=True) as conn:
+        tables = [row[0] for row in conn.execute("SHOW TABLES").fetchall()]
+        row_count = conn.execute("SELECT COUNT(*) FROM metrics").fetchone()[0]
 
-    conn.close()
+    assert tables == ["metrics"]
+    assert row_count == 3